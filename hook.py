@@ -4,10 +4,101 @@ Claude Code Hook Script to capture responses and send to Obsidian MCP Server
 """
 
 import json
+import os
 import sys
 from datetime import datetime
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Responses shorter than this are not worth saving
+MIN_CONTENT_LENGTH = 10
+
+# Payloads below this size are skipped without parsing. This is a heuristic, not an exact bound:
+# 25 bytes is the smallest payload whose *string* response can reach MIN_CONTENT_LENGTH
+# ({"response":"0123456789"}), but smaller payloads can still produce enough text once parsed.
+# Non-string responses are turned into text with str() ({"response":[0,0,0,0]} gives
+# "[0, 0, 0, 0]"), and payloads without a response are dumped indented ({"a":0}). Dropping
+# those along with the genuinely short responses is intended.
+MIN_PAYLOAD_BYTES = 25
+
+# Queue location, resolved once per process
+QUEUE_DIR = Path.home() / ".claude" / "mcp_queue"
+QUEUE_FILE = QUEUE_DIR / "queue.ndjson"
+
+# Roll the queue file over once it grows past this size
+QUEUE_MAX_BYTES = 4 * 1024 * 1024
+
+# Raw flags for queue appends; O_CLOEXEC is not available on every platform, and
+# O_BINARY (Windows only) stops '\n' being rewritten as CRLF
+QUEUE_OPEN_FLAGS = (
+    os.O_WRONLY | os.O_CREAT | os.O_APPEND | getattr(os, "O_CLOEXEC", 0) | getattr(os, "O_BINARY", 0)
+)
+
+
+def dump_json(data) -> bytes:
+    """Serialize data to JSON bytes, using orjson when it is available"""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, separators=(",", ":")).encode("utf-8")
+
+
+def load_json(raw: bytes):
+    """Parse JSON bytes, using orjson when it is available"""
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def write_status(status: dict):
+    """Write a hook status line to stdout in a single write"""
+    sys.stdout.buffer.write(dump_json(status) + b"\n")
+    sys.stdout.buffer.flush()
+
+
+def rotate_queue(queue_file: Path, full: os.stat_result):
+    """Move the full queue file aside, unless another hook has already replaced it"""
+    try:
+        current = os.stat(queue_file)
+    except FileNotFoundError:
+        return
+    if (current.st_dev, current.st_ino) != (full.st_dev, full.st_ino):
+        # Another hook rotated it first; queue_file is already a fresh file
+        return
+
+    # The pid keeps hooks rotating in the same second from renaming onto each other's files
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    try:
+        os.replace(queue_file, queue_file.with_name(f"queue.{timestamp}.{os.getpid()}.ndjson"))
+    except FileNotFoundError:
+        pass
+
+
+def append_to_queue(queue_file: Path, record: bytes):
+    """Append one NDJSON record to the queue file, rotating it when it gets too large"""
+    try:
+        fd = os.open(queue_file, QUEUE_OPEN_FLAGS, 0o644)
+    except FileNotFoundError:
+        # Only create the queue directory the first time it is missing
+        queue_file.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(queue_file, QUEUE_OPEN_FLAGS, 0o644)
+    try:
+        st = os.fstat(fd)
+        if st.st_size > QUEUE_MAX_BYTES:
+            os.close(fd)
+            fd = -1
+            rotate_queue(queue_file, st)
+            fd = os.open(queue_file, QUEUE_OPEN_FLAGS, 0o644)
+
+        # A single O_APPEND write keeps concurrent records from interleaving
+        os.write(fd, record)
+    finally:
+        if fd >= 0:
+            os.close(fd)
+
 
 def extract_response_content(hook_data: dict) -> str:
     """Extract the actual response content from Claude Code hook data"""
@@ -33,20 +124,22 @@ def extract_response_content(hook_data: dict) -> str:
 def main():
     """Main hook handler"""
     try:
-        hook_data = json.load(sys.stdin)
-        content = extract_response_content(hook_data)
+        raw = sys.stdin.buffer.read()
+
+        # Skip payloads too small to hold a useful response without parsing them
+        if len(raw) < MIN_PAYLOAD_BYTES:
+            write_status({"allow": True, "message": "Content too short, skipping"})
+            return
+
+        content = extract_response_content(load_json(raw))
 
         # Skip if content is too short
-        if len(content.strip()) < 10:
-            print(json.dumps({"allow": True, "message": "Content too short, skipping"}))
+        if len(content.strip()) < MIN_CONTENT_LENGTH:
+            write_status({"allow": True, "message": "Content too short, skipping"})
             return
 
         # Queue for MCP processing
-        temp_dir = Path.home() / ".claude" / "mcp_queue"
-        temp_dir.mkdir(parents=True, exist_ok=True)
-
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        temp_file = temp_dir / f"response_{timestamp}.json"
 
         mcp_request = {
             "content": content,
@@ -54,14 +147,14 @@ def main():
             "tags": ["claude-code", "ai-response"]
         }
 
-        with open(temp_file, "w") as f:
-            json.dump(mcp_request, f, indent=2)
+        # Serialize up front so the record is appended with a single call
+        append_to_queue(QUEUE_FILE, dump_json(mcp_request) + b"\n")
 
-        print(json.dumps({"allow": True, "message": f"Response queued: {temp_file}"}))
+        write_status({"allow": True, "message": f"Response queued: {QUEUE_FILE}"})
 
     except Exception as e:
-        print(json.dumps({"allow": True, "message": f"Hook error: {str(e)}"}))
+        write_status({"allow": True, "message": f"Hook error: {str(e)}"})
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
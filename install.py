@@ -4,13 +4,16 @@ Obsidian MCP Server Installer for Claude Code
 Uses standard claude mcp add commands with proper scope configuration
 """
 
+import importlib.util
 import json
 import os
+import shlex
 import shutil
 import subprocess
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 
 
 class Colors:
@@ -24,6 +27,19 @@ class Colors:
     BOLD = '\033[1m'
 
 
+# Name the server is registered under with claude mcp
+SERVER_NAME = "obsidian-claude-code"
+
+
+# Default templates for new project configs; the placeholder is filled with the project name
+PROJECT_NAME_PLACEHOLDER = "__PROJECT__"
+PROJECT_TEMPLATES = {
+    "report": "# {title}\n\n**📋 Report Generated**\n- **Date:** {timestamp}\n- **Project:** __PROJECT__\n- **Type:** Technical Report\n\n---\n\n{content}\n\n---\n\n*Generated by Claude Code*",
+    "review": "# Code Review: {title}\n\n**👀 Review Details**\n- **Date:** {timestamp}\n- **Project:** __PROJECT__\n- **Reviewer:** Claude Code\n\n---\n\n## Summary\n\n{content}\n\n---\n\n*Automated review by Claude Code*",
+    "note": "# {title}\n\n**📝 Note**\n- **Created:** {timestamp}\n- **Project:** __PROJECT__\n\n---\n\n{content}"
+}
+
+
 def print_header(text: str):
     print(f"\n{Colors.HEADER}{Colors.BOLD}=== {text} ==={Colors.ENDC}")
 
@@ -44,14 +60,16 @@ def print_info(text: str):
     print(f"{Colors.OKBLUE}ℹ {text}{Colors.ENDC}")
 
 
-def run_command(cmd: str, check: bool = True) -> subprocess.CompletedProcess:
-    """Run a shell command and return the result"""
+def run_command(argv: List[str], check: bool = True) -> subprocess.CompletedProcess:
+    """Run a command directly (no intermediate shell) and return the result"""
+    # Without a shell, Windows won't find .cmd shims (e.g. npm's claude.cmd) unless resolved here
+    argv = [shutil.which(argv[0]) or argv[0]] + argv[1:]
     try:
-        result = subprocess.run(cmd, shell=True, capture_output=True, text=True, check=check)
+        result = subprocess.run(argv, capture_output=True, text=True, check=check)
         return result
     except subprocess.CalledProcessError as e:
         if check:
-            print_error(f"Command failed: {cmd}")
+            print_error(f"Command failed: {shlex.join(argv)}")
             print_error(f"Error: {e.stderr}")
             raise
         return e
@@ -60,7 +78,7 @@ def run_command(cmd: str, check: bool = True) -> subprocess.CompletedProcess:
 def check_claude_code_available() -> bool:
     """Check if Claude Code CLI is available"""
     try:
-        result = run_command("claude --version", check=False)
+        result = run_command(["claude", "--version"], check=False)
         if result.returncode == 0:
             print_success("Claude Code CLI is available")
             return True
@@ -85,7 +103,9 @@ def check_python_version() -> bool:
 def check_mcp_installed() -> bool:
     """Check if MCP package and its dependencies are installed"""
     try:
-        import mcp
+        # Locate the package without running its __init__ (which pulls in pydantic, anyio, ...)
+        if importlib.util.find_spec("mcp") is None:
+            raise ImportError("mcp")
         print_success("MCP package is installed")
         
         # Check critical dependencies that often cause import issues
@@ -121,10 +141,10 @@ def install_mcp() -> bool:
     try:
         # Uninstall and reinstall MCP to ensure clean state
         print_info("Ensuring clean MCP installation...")
-        run_command("pip uninstall -y mcp", check=False)
+        run_command(["pip", "uninstall", "-y", "mcp"], check=False)
         
         # Install MCP with all dependencies to user packages
-        result = run_command("pip install --user mcp")
+        result = run_command(["pip", "install", "--user", "mcp"])
         if result.returncode != 0:
             print_error("Failed to install MCP package")
             return False
@@ -134,11 +154,11 @@ def install_mcp() -> bool:
         critical_deps = ["jsonschema", "pydantic", "anyio", "httpx"]
         for dep in critical_deps:
             print_info(f"Installing {dep} dependency to user packages...")
-            result = run_command(f"pip install --user --force-reinstall {dep}")
+            result = run_command(["pip", "install", "--user", "--force-reinstall", dep])
             if result.returncode != 0:
                 print_warning(f"Failed to install {dep} to user packages")
                 print_info(f"Trying alternative {dep} installation...")
-                result = run_command(f"pip install {dep}")
+                result = run_command(["pip", "install", dep])
                 if result.returncode != 0:
                     print_error(f"Failed to install {dep} dependency")
                     return False
@@ -155,27 +175,33 @@ def get_obsidian_vault_path() -> Optional[Path]:
     print_info("Please provide your Obsidian vault path:")
     
     # Suggest common locations
+    home = Path.home()
     common_paths = [
-        Path.home() / "Documents" / "Obsidian Vault",
-        Path.home() / "Obsidian",
-        Path.home() / "Documents" / "Notes",
+        home / "Documents" / "Obsidian Vault",
+        home / "Obsidian",
+        home / "Documents" / "Notes",
     ]
     
+    # Check each suggestion once, concurrently so slow (e.g. network) home dirs don't serialize
+    with ThreadPoolExecutor(max_workers=len(common_paths)) as executor:
+        resolved = list(zip(common_paths, executor.map(Path.exists, common_paths)))
+    
     print("Common locations:")
-    for i, path in enumerate(common_paths, 1):
-        exists = "✓" if path.exists() else "✗"
-        print(f"  {i}. {path} {exists}")
+    for i, (path, exists) in enumerate(resolved, 1):
+        print(f"  {i}. {path} {'✓' if exists else '✗'}")
     
     while True:
         response = input(f"\nEnter vault path (or number 1-{len(common_paths)}): ").strip()
         
         # Check if it's a number
         if response.isdigit() and 1 <= int(response) <= len(common_paths):
-            vault_path = common_paths[int(response) - 1]
+            vault_path, exists = resolved[int(response) - 1]
         else:
-            vault_path = Path(response).expanduser()
+            # Normalize typed paths up front so relative input is registered as an absolute path
+            vault_path = Path(response).expanduser().resolve()
+            exists = vault_path.exists()
         
-        if vault_path.exists():
+        if exists:
             print_success(f"Found Obsidian vault at: {vault_path}")
             return vault_path
         else:
@@ -227,10 +253,13 @@ def add_mcp_server(server_path: Path, vault_path: Path, scope: str) -> bool:
     try:
         # Build the command with correct syntax
         # Format: claude mcp add <name> <command> [args...] [flags]
-        cmd = f'claude mcp add obsidian-claude-code python3 "{server_path}" -s {scope} -e OBSIDIAN_VAULT_PATH="{vault_path}"'
+        argv = [
+            "claude", "mcp", "add", SERVER_NAME, "python3", str(server_path),
+            "-s", scope, "-e", f"OBSIDIAN_VAULT_PATH={vault_path}",
+        ]
         
         print_info(f"Adding MCP server with {scope} scope...")
-        result = run_command(cmd)
+        result = run_command(argv)
         
         if result.returncode == 0:
             print_success(f"MCP server added successfully with {scope} scope")
@@ -243,6 +272,18 @@ def add_mcp_server(server_path: Path, vault_path: Path, scope: str) -> bool:
         return False
 
 
+def write_file_atomic(path: Path, data: bytes):
+    """Write data to a temp file and rename it over path so readers never see a partial file"""
+    tmp_path = path.with_name(path.name + ".tmp")
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        os.write(fd, data)
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+    os.replace(tmp_path, path)
+
+
 def create_project_config() -> bool:
     """Create project-specific Obsidian configuration"""
     current_dir = Path.cwd()
@@ -265,16 +306,14 @@ def create_project_config() -> bool:
     config = {
         "folder": folder,
         "templates": {
-            "report": f"# {{title}}\n\n**📋 Report Generated**\n- **Date:** {{timestamp}}\n- **Project:** {current_dir.name}\n- **Type:** Technical Report\n\n---\n\n{{content}}\n\n---\n\n*Generated by Claude Code*",
-            "review": f"# Code Review: {{title}}\n\n**👀 Review Details**\n- **Date:** {{timestamp}}\n- **Project:** {current_dir.name}\n- **Reviewer:** Claude Code\n\n---\n\n## Summary\n\n{{content}}\n\n---\n\n*Automated review by Claude Code*",
-            "note": f"# {{title}}\n\n**📝 Note**\n- **Created:** {{timestamp}}\n- **Project:** {current_dir.name}\n\n---\n\n{{content}}"
+            name: template.replace(PROJECT_NAME_PLACEHOLDER, current_dir.name)
+            for name, template in PROJECT_TEMPLATES.items()
         }
     }
     
     try:
         claude_dir.mkdir(exist_ok=True)
-        with open(config_file, "w") as f:
-            json.dump(config, f, indent=2)
+        write_file_atomic(config_file, json.dumps(config, indent=2).encode("utf-8"))
         print_success(f"Created project config: {config_file}")
         print_info(f"Claude Code will save files to: {folder}")
         return True
@@ -286,9 +325,20 @@ def create_project_config() -> bool:
 def remove_existing_server() -> bool:
     """Remove existing obsidian-claude-code server if it exists"""
     try:
-        # Try to remove from all scopes
-        for scope in ["local", "user", "project"]:
-            result = run_command(f"claude mcp remove obsidian-claude-code -s {scope}", check=False)
+        def remove_from(scopes):
+            return [
+                (scope, run_command(["claude", "mcp", "remove", SERVER_NAME, "-s", scope], check=False))
+                for scope in scopes
+            ]
+
+        # Try to remove from all scopes. local and user both rewrite ~/.claude.json, so they
+        # run one after the other; project only touches .mcp.json and can run alongside them
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            shared_config = executor.submit(remove_from, ["local", "user"])
+            project_config = executor.submit(remove_from, ["project"])
+            results = shared_config.result() + project_config.result()
+
+        for scope, result in results:
             if result.returncode == 0:
                 print_success(f"Removed existing server from {scope} scope")
         return True
@@ -371,8 +421,8 @@ def main():
 def check_existing_mcp_server() -> bool:
     """Check if obsidian-claude-code MCP server is already installed"""
     try:
-        result = run_command("claude mcp list", check=False)
-        if result.returncode == 0 and "obsidian-claude-code" in result.stdout:
+        result = run_command(["claude", "mcp", "list"], check=False)
+        if result.returncode == 0 and SERVER_NAME in result.stdout:
             return True
         return False
     except Exception:
@@ -4,76 +4,350 @@ MCP Server for saving Claude Code responses to Obsidian
 """
 
 import asyncio
+import functools
 import json
 import os
+import re
+import sys
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List
-from urllib.parse import unquote, urlparse, parse_qs
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import unquote
 
 from mcp.server import Server
 from mcp.server.stdio import stdio_server
 from mcp.types import Tool
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
-def get_project_config() -> Dict[str, Any]:
+
+# Anything other than letters, digits, spaces, hyphens and underscores is dropped from filenames
+UNSAFE_TITLE_CHARS = re.compile(r"[^\w \-]")
+
+# Raw flags for note writes; O_BINARY (Windows only) stops '\n' being rewritten as CRLF
+NOTE_OPEN_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0)
+
+# Notes longer than this are returned as a separate content block from the header
+LARGE_NOTE_CHARS = 1024 * 1024
+
+# Write-behind queue (enabled by OBSIDIAN_WRITE_BEHIND): saves are batched and
+# flushed after WRITE_BEHIND_DELAY seconds or once WRITE_BEHIND_MAX_PENDING notes are waiting
+WRITE_BEHIND_DELAY = 0.5
+WRITE_BEHIND_MAX_PENDING = 16
+pending_writes: List[Tuple[str, str]] = []
+flush_task: Optional["asyncio.Future[None]"] = None
+flush_lock: Optional[asyncio.Lock] = None
+failed_writes: List[Tuple[str, Exception]] = []
+
+# Folders already created this process, so repeat saves skip the mkdir
+created_folders = set()
+
+# Project config per working directory: (config file or None, its mtime_ns, parsed config)
+project_config_cache: Dict[str, Tuple[Optional[Path], int, Dict[str, Any]]] = {}
+
+# Configuration used when a project has no .claude/obsidian.json
+DEFAULT_CONFIG: Dict[str, Any] = {
+    "folder": "Claude Code",
+    "templates": {
+        "report": "# {title}\n\n**Generated:** {timestamp}\n**Project:** {project}\n\n{content}",
+        "review": "# Code Review: {title}\n\n**Generated:** {timestamp}\n**Project:** {project}\n\n{content}",
+        "note": "# {title}\n\n**Created:** {timestamp}\n**Project:** {project}\n\n{content}"
+    }
+}
+
+
+def load_json(raw: bytes):
+    """Parse JSON bytes, using orjson when it is available"""
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def load_project_config(cwd: str) -> Tuple[Optional[Path], int, Dict[str, Any]]:
+    """Find and load the Obsidian configuration for cwd as (config file, mtime_ns, config)"""
+    # Look for .claude/obsidian.json in current directory and parents, stopping at the first hit
+    path = Path(cwd)
+    while True:
+        config_file = path / ".claude" / "obsidian.json"
+        try:
+            mtime_ns = config_file.stat().st_mtime_ns
+        except OSError:
+            mtime_ns = None
+        if mtime_ns is not None:
+            try:
+                return config_file, mtime_ns, load_json(config_file.read_bytes())
+            except Exception:
+                # Fallback to default until the file changes
+                return config_file, mtime_ns, DEFAULT_CONFIG
+        if path.parent == path:
+            break
+        path = path.parent
+    
+    # Default configuration if no project config found
+    return None, 0, DEFAULT_CONFIG
+
+
+def get_project_config(cwd: Optional[Path] = None) -> Dict[str, Any]:
     """Get project-specific Obsidian configuration from .claude/obsidian.json"""
-    try:
-        # Look for .claude/obsidian.json in current directory and parents
-        current_path = Path.cwd()
-        
-        for path in [current_path] + list(current_path.parents):
-            config_file = path / ".claude" / "obsidian.json"
-            if config_file.exists():
-                with open(config_file, "r") as f:
-                    return json.load(f)
-        
-        # Default configuration if no project config found
-        return {
-            "folder": "Claude Code",
-            "templates": {
-                "report": "# {title}\n\n**Generated:** {timestamp}\n**Project:** {project}\n\n{content}",
-                "review": "# Code Review: {title}\n\n**Generated:** {timestamp}\n**Project:** {project}\n\n{content}",
-                "note": "# {title}\n\n**Created:** {timestamp}\n**Project:** {project}\n\n{content}"
-            }
-        }
-    except Exception:
-        # Fallback to default
-        return {
-            "folder": "Claude Code",
-            "templates": {
-                "report": "# {title}\n\n**Generated:** {timestamp}\n**Project:** {project}\n\n{content}",
-                "review": "# Code Review: {title}\n\n**Generated:** {timestamp}\n**Project:** {project}\n\n{content}",
-                "note": "# {title}\n\n**Created:** {timestamp}\n**Project:** {project}\n\n{content}"
-            }
-        }
+    key = str(cwd if cwd is not None else get_working_dir())
+    if os.getenv("OBSIDIAN_DISABLE_CACHE"):
+        return load_project_config(key)[2]
+
+    cached = project_config_cache.get(key)
+    if cached is not None:
+        config_file, mtime_ns, config = cached
+        if config_file is None:
+            # No config was found: keep the defaults until one appears in the directory itself
+            # (e.g. from install.py --project-config); a new one in a parent needs clear_caches()
+            if not os.path.exists(os.path.join(key, ".claude", "obsidian.json")):
+                return config
+        else:
+            # Reuse a found config while it is unchanged
+            try:
+                if config_file.stat().st_mtime_ns == mtime_ns:
+                    return config
+            except OSError:
+                pass
 
+    cached = load_project_config(key)
+    project_config_cache[key] = cached
+    return cached[2]
 
+
+def clear_caches():
+    """Forget cached configuration and folders so the next lookup goes back to disk"""
+    project_config_cache.clear()
+    get_working_dir.cache_clear()
+    get_vault_path.cache_clear()
+    created_folders.clear()
+
+
+@functools.lru_cache(maxsize=1)
+def get_working_dir() -> Path:
+    """Get the server's working directory (resolved once; call clear_caches() after a chdir)"""
+    return Path.cwd()
+
+
+@functools.lru_cache(maxsize=1)
 def get_vault_path() -> Path:
-    """Get Obsidian vault path from environment or config"""
+    """Get Obsidian vault path from environment or config (resolved once per process)"""
     vault_path = os.getenv("OBSIDIAN_VAULT_PATH")
     if not vault_path:
         vault_path = os.path.expanduser("~/Documents/ObsidianVault")
 
     path = Path(vault_path)
-    if not path.exists():
-        path.mkdir(parents=True, exist_ok=True)
+    path.mkdir(parents=True, exist_ok=True)
 
     return path
 
 
-def generate_frontmatter(tags: List[str]) -> str:
+async def ensure_folder(path: Path):
+    """Create path (and parents) off the event loop unless this process already has"""
+    if path not in created_folders:
+        await run_blocking(path.mkdir, parents=True, exist_ok=True)
+        created_folders.add(path)
+
+
+def generate_frontmatter(tags: List[str], created: str) -> str:
     """Generate YAML frontmatter for Obsidian note"""
-    timestamp = datetime.now().isoformat()
-    
-    frontmatter = "---\n"
-    frontmatter += f"created: {timestamp}\n"
-    frontmatter += f"source: claude-code\n"
-    frontmatter += f"tags: {tags}\n"
-    frontmatter += "---\n\n"
-    
-    return frontmatter
+    # A JSON array is a valid YAML flow sequence and quotes tags containing ',' or ':'
+    return f"---\ncreated: {created}\nsource: claude-code\ntags: {json.dumps(tags, ensure_ascii=False)}\n---\n\n"
+
+
+def text_content(*texts: str) -> List[Dict[str, str]]:
+    """Build a tool result with one text block per argument"""
+    return [{"type": "text", "text": text} for text in texts]
+
+
+def read_text_file(path: Path) -> str:
+    """Read a UTF-8 text file"""
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def write_text_file(path: str, text: str):
+    """Write a UTF-8 text file with raw os.write calls (no buffered text layer)"""
+    data = memoryview(text.encode("utf-8"))
+    try:
+        fd = os.open(path, NOTE_OPEN_FLAGS, 0o644)
+    except FileNotFoundError:
+        # The folder was remembered as created but has since been removed
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd = os.open(path, NOTE_OPEN_FLAGS, 0o644)
+    try:
+        # os.write may write less than requested for large payloads
+        while data:
+            data = data[os.write(fd, data):]
+    finally:
+        os.close(fd)
+
+
+def write_text_files(files: List[Tuple[str, str]]) -> List[Tuple[str, Exception]]:
+    """Write several UTF-8 text files in turn, carrying on past failures and returning them"""
+    failures = []
+    for path, text in files:
+        try:
+            write_text_file(path, text)
+        except Exception as e:
+            failures.append((path, e))
+    return failures
+
+
+async def run_blocking(func, *args, **kwargs):
+    """Run blocking file IO in the default executor so the event loop keeps serving requests"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, functools.partial(func, *args, **kwargs))
+
+
+async def write_notes(files: List[Tuple[str, str]]):
+    """Write notes now, or queue them for the background flusher when write-behind is enabled"""
+    global flush_task
+    if not os.getenv("OBSIDIAN_WRITE_BEHIND"):
+        failures = await run_blocking(write_text_files, files)
+        if failures:
+            raise Exception("\n".join(str(e) for _, e in failures))
+        return
+
+    pending_writes.extend(files)
+    if len(pending_writes) >= WRITE_BEHIND_MAX_PENDING:
+        await flush_pending_writes()
+    elif flush_task is None or flush_task.done():
+        flush_task = asyncio.ensure_future(flush_after_delay())
+
+
+async def flush_pending_writes() -> List[Tuple[str, Exception]]:
+    """Write out every queued note in a single executor job, returning the writes that failed"""
+    global flush_lock
+    # Created lazily so it binds to the running event loop
+    if flush_lock is None:
+        flush_lock = asyncio.Lock()
+
+    # Holding the lock means a caller also waits for a flush that is already in progress
+    async with flush_lock:
+        if not pending_writes:
+            return []
+        batch = pending_writes[:]
+        del pending_writes[:]
+        # One bad note must not cost the rest of the batch; failures are kept for sync_obsidian
+        failures = await run_blocking(write_text_files, batch)
+        failed_writes.extend(failures)
+        return failures
+
+
+def report_write_failures(failures: List[Tuple[str, Exception]]):
+    """Log queued notes that could not be written"""
+    for path, e in failures:
+        print(f"Failed to write queued note {path}: {e}", file=sys.stderr)
+
+
+async def flush_after_delay():
+    """Flush queued notes once the write-behind delay has passed"""
+    # Keep going while notes queued during a flush are still waiting, since no new timer starts for them
+    while True:
+        await asyncio.sleep(WRITE_BEHIND_DELAY)
+        report_write_failures(await flush_pending_writes())
+        if not pending_writes:
+            return
+
 
+# Tool definitions never change, so build them once and share them across list_tools calls
+TOOLS = [
+    Tool(
+        name="save_to_obsidian",
+        description="Save content to Obsidian using project configuration. Use this when Claude Code should save reports, reviews, or other content to the user's Obsidian vault.",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "content": {
+                    "type": "string",
+                    "description": "The content to save"
+                },
+                "title": {
+                    "type": "string",
+                    "description": "Title for the document"
+                },
+                "type": {
+                    "type": "string",
+                    "enum": ["report", "review", "note"],
+                    "description": "Type of content (determines template)",
+                    "default": "note"
+                },
+                "tags": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "Additional tags for the note",
+                    "default": []
+                }
+            },
+            "required": ["content", "title"]
+        }
+    ),
+    Tool(
+        name="save_batch_to_obsidian",
+        description="Save several pieces of content to Obsidian in one call. Use this instead of repeated save_to_obsidian calls when Claude Code has multiple reports, reviews, or notes to save at once.",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "items": {
+                    "type": "array",
+                    "description": "The documents to save",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "content": {
+                                "type": "string",
+                                "description": "The content to save"
+                            },
+                            "title": {
+                                "type": "string",
+                                "description": "Title for the document"
+                            },
+                            "type": {
+                                "type": "string",
+                                "enum": ["report", "review", "note"],
+                                "description": "Type of content (determines template)",
+                                "default": "note"
+                            },
+                            "tags": {
+                                "type": "array",
+                                "items": {"type": "string"},
+                                "description": "Additional tags for the note",
+                                "default": []
+                            }
+                        },
+                        "required": ["content", "title"]
+                    }
+                }
+            },
+            "required": ["items"]
+        }
+    ),
+    Tool(
+        name="sync_obsidian",
+        description="Wait until every saved note has been written to the Obsidian vault. Only needed when the server runs with OBSIDIAN_WRITE_BEHIND enabled and a note must be on disk before continuing.",
+        inputSchema={
+            "type": "object",
+            "properties": {}
+        }
+    ),
+    Tool(
+        name="read_obsidian_url",
+        description="Read a file from Obsidian using an Obsidian URL format (e.g., obsidian://open?vault=VaultName&file=path/to/file). Handles URL-encoded file paths with spaces and special characters.",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "url": {
+                    "type": "string",
+                    "description": "The Obsidian URL (e.g., obsidian://open?vault=MyVault&file=Notes%2FMy%20Note)"
+                }
+            },
+            "required": ["url"]
+        }
+    )
+]
 
 # Create the server
 server = Server("obsidian-claude-code")
@@ -81,88 +355,65 @@ server = Server("obsidian-claude-code")
 @server.list_tools()
 async def handle_list_tools():
     """List available tools."""
-    return [
-        Tool(
-            name="save_to_obsidian",
-            description="Save content to Obsidian using project configuration. Use this when Claude Code should save reports, reviews, or other content to the user's Obsidian vault.",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "content": {
-                        "type": "string",
-                        "description": "The content to save"
-                    },
-                    "title": {
-                        "type": "string",
-                        "description": "Title for the document"
-                    },
-                    "type": {
-                        "type": "string",
-                        "enum": ["report", "review", "note"],
-                        "description": "Type of content (determines template)",
-                        "default": "note"
-                    },
-                    "tags": {
-                        "type": "array",
-                        "items": {"type": "string"},
-                        "description": "Additional tags for the note",
-                        "default": []
-                    }
-                },
-                "required": ["content", "title"]
-            }
-        ),
-        Tool(
-            name="read_obsidian_url",
-            description="Read a file from Obsidian using an Obsidian URL format (e.g., obsidian://open?vault=VaultName&file=path/to/file). Handles URL-encoded file paths with spaces and special characters.",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "url": {
-                        "type": "string",
-                        "description": "The Obsidian URL (e.g., obsidian://open?vault=MyVault&file=Notes%2FMy%20Note)"
-                    }
-                },
-                "required": ["url"]
-            }
-        )
-    ]
+    return TOOLS
+
+
+# Tool name -> coroutine factory taking the call arguments (applying the schema defaults)
+TOOL_HANDLERS = {
+    "save_to_obsidian": lambda arguments: save_to_obsidian(
+        arguments.get("content", ""),
+        arguments.get("title", "Untitled"),
+        arguments.get("type", "note"),
+        arguments.get("tags", [])
+    ),
+    "save_batch_to_obsidian": lambda arguments: save_batch_to_obsidian(
+        arguments.get("items", [])
+    ),
+    "read_obsidian_url": lambda arguments: read_obsidian_url(
+        arguments.get("url", "")
+    ),
+    "sync_obsidian": lambda arguments: sync_obsidian(),
+}
 
 
 @server.call_tool()
 async def handle_call_tool(name: str, arguments: dict):
     """Handle tool calls."""
-    if name == "save_to_obsidian":
-        return await save_to_obsidian(
-            arguments.get("content", ""),
-            arguments.get("title", "Untitled"),
-            arguments.get("type", "note"),
-            arguments.get("tags", [])
-        )
-    elif name == "read_obsidian_url":
-        return await read_obsidian_url(
-            arguments.get("url", "")
-        )
-    else:
+    handler = TOOL_HANDLERS.get(name)
+    if handler is None:
         raise ValueError(f"Unknown tool: {name}")
+    return await handler(arguments)
+
+
+def parse_obsidian_query(rest: str) -> Dict[str, str]:
+    """Decode the query of an obsidian: URL (everything after the scheme), first value wins"""
+    query = rest.partition("?")[2].partition("#")[0]
+    params = {}
+    for pair in query.split("&"):
+        name, sep, value = pair.partition("=")
+        # Same as parse_qs: skip pairs without a value
+        if not sep or not value:
+            continue
+        params.setdefault(unquote(name.replace("+", " ")), unquote(value.replace("+", " ")))
+    return params
 
 
 async def read_obsidian_url(url: str):
     """Read a file from Obsidian using an Obsidian URL"""
     try:
         # Parse the Obsidian URL
-        parsed = urlparse(url)
+        scheme, _, rest = url.strip().partition(":")
         
         # Check if it's an Obsidian URL
-        if parsed.scheme != "obsidian":
+        if scheme.lower() != "obsidian":
             raise ValueError(f"Not an Obsidian URL: {url}")
         
         # Parse query parameters
-        params = parse_qs(parsed.query)
+        params = parse_obsidian_query(rest)
         
         # Get vault name and file path
-        vault_name = params.get("vault", [""])[0]
-        file_path = params.get("file", [""])[0]
+        vault_name = params.get("vault", "")
+        file_path = params.get("file", "")
         
         if not file_path:
             raise ValueError("No file path specified in URL")
@@ -178,101 +429,171 @@ async def read_obsidian_url(url: str):
         
         # Construct the full path to the file
         # Replace forward slashes with OS-appropriate separators
-        file_path_parts = file_path.split('/')
-        full_path = vault_path
-        for part in file_path_parts:
-            full_path = full_path / part
+        full_path = vault_path.joinpath(*file_path.split('/'))
         
         # Add .md extension if not present
         if not full_path.suffix:
             full_path = full_path.with_suffix('.md')
         
-        # Check if file exists
-        if not full_path.exists():
+        # Read the file content off the event loop; a missing file surfaces from open() itself
+        try:
+            content = await run_blocking(read_text_file, full_path)
+        except FileNotFoundError:
             raise FileNotFoundError(f"File not found: {full_path}")
         
-        # Read the file content
-        with open(full_path, "r", encoding="utf-8") as f:
-            content = f.read()
+        header = f"Successfully read file from Obsidian\nVault: {vault_name}\nFile: {file_path}\nPath: {full_path}"
+        
+        # Large notes go back as their own block rather than being copied into one giant string
+        if len(content) > LARGE_NOTE_CHARS:
+            return text_content(header, content)
         
-        return [
-            {
-                "type": "text",
-                "text": f"Successfully read file from Obsidian\nVault: {vault_name}\nFile: {file_path}\nPath: {full_path}\n\n---\n\n{content}"
-            }
-        ]
+        return text_content(f"{header}\n\n---\n\n{content}")
     except Exception as e:
         raise Exception(f"Failed to read Obsidian URL: {str(e)}")
 
 
+def format_timestamps(now: datetime) -> Tuple[str, str, str]:
+    """Format one clock reading as (template timestamp, filename prefix, frontmatter created)"""
+    return now.strftime("%Y-%m-%d %H:%M:%S"), now.strftime("%Y%m%d_%H%M%S"), now.isoformat()
+
+
+def build_note(config: Dict[str, Any], project_name: str, timestamps: Tuple[str, str, str],
+               content: str, title: str, content_type: str, tags: List[str]) -> Tuple[str, str]:
+    """Render a note from its template and return (filename, full file content)"""
+    # Prepare template variables
+    timestamp, timestamp_prefix, created = timestamps
+    
+    # Select template based on content type
+    template = config.get("templates", {}).get(content_type, "{content}")
+    
+    # Format content using template
+    formatted_content = template.format(
+        title=title,
+        timestamp=timestamp,
+        project=project_name,
+        content=content
+    )
+    
+    # Create filename (sanitize title for filesystem)
+    safe_title = UNSAFE_TITLE_CHARS.sub("", title).rstrip()
+    filename = f"{timestamp_prefix}_{safe_title}.md"
+    
+    # Combine all tags
+    all_tags = ["claude-code", content_type, project_name.lower(), *tags]
+    
+    # Build frontmatter and formatted content as one buffer
+    full_content = f"{generate_frontmatter(all_tags, created)}{formatted_content}"
+    
+    return filename, full_content
+
+
 async def save_to_obsidian(content: str, title: str, content_type: str, tags: List[str]):
     """Save content to Obsidian using project configuration and templates"""
     try:
         # Get configuration and paths
-        config = get_project_config()
+        cwd = get_working_dir()
+        config = get_project_config(cwd)
         vault_path = get_vault_path()
-        project_name = Path.cwd().name
+        project_name = cwd.name
         
-        # Prepare template variables
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        
-        # Select template based on content type
-        template = config.get("templates", {}).get(content_type, "{content}")
-        
-        # Format content using template
-        formatted_content = template.format(
-            title=title,
-            timestamp=timestamp,
-            project=project_name,
-            content=content
+        # Render the note from a single clock reading
+        filename, full_content = build_note(
+            config, project_name, format_timestamps(datetime.now()), content, title, content_type, tags
         )
         
-        # Create filename (sanitize title for filesystem)
-        safe_title = "".join(c for c in title if c.isalnum() or c in (' ', '-', '_')).rstrip()
-        timestamp_prefix = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"{timestamp_prefix}_{safe_title}.md"
-        
         # Determine target folder
         project_folder = config.get("folder", "Claude Code")
         target_path = vault_path / project_folder
         
         # Ensure target folder exists
-        target_path.mkdir(parents=True, exist_ok=True)
+        await ensure_folder(target_path)
         
-        # Create full file path
-        file_path = target_path / filename
+        # Create full file path as a plain string; only the folder needs Path handling
+        file_path = os.path.join(target_path, filename)
         
-        # Combine all tags
-        all_tags = ["claude-code", content_type, project_name.lower()] + tags
+        # Write file off the event loop
+        await write_notes([(file_path, full_content)])
+        
+        return text_content(
+            f"Successfully saved {content_type} '{title}' to {file_path}\nProject: {project_name}\nFolder: {project_folder}"
+        )
+    except Exception as e:
+        raise Exception(f"Failed to save to Obsidian: {str(e)}")
+
+
+async def save_batch_to_obsidian(items: List[Dict[str, Any]]):
+    """Save several notes at once, sharing the config lookup and a single write job"""
+    try:
+        # Resolve configuration, paths and the clock once for the whole batch
+        cwd = get_working_dir()
+        config = get_project_config(cwd)
+        vault_path = get_vault_path()
+        project_name = cwd.name
+        timestamps = format_timestamps(datetime.now())
         
-        # Generate frontmatter
-        frontmatter = generate_frontmatter(all_tags)
+        project_folder = config.get("folder", "Claude Code")
+        target_path = vault_path / project_folder
+        await ensure_folder(target_path)
         
-        # Combine frontmatter and formatted content
-        full_content = frontmatter + formatted_content
+        # Render every note up front; notes sharing a title and second get a numeric suffix
+        writes = []
+        used_names = set()
+        for item in items:
+            filename, full_content = build_note(
+                config,
+                project_name,
+                timestamps,
+                item.get("content", ""),
+                item.get("title", "Untitled"),
+                item.get("type", "note"),
+                item.get("tags", [])
+            )
+            stem, n = filename[:-len(".md")], 2
+            while filename in used_names:
+                filename = f"{stem}_{n}.md"
+                n += 1
+            used_names.add(filename)
+            writes.append((os.path.join(target_path, filename), full_content))
         
-        # Write file
-        with open(file_path, "w", encoding="utf-8") as f:
-            f.write(full_content)
+        # Write every file in one executor job instead of one event loop hop per note
+        await write_notes(writes)
         
-        return [
-            {
-                "type": "text",
-                "text": f"Successfully saved {content_type} '{title}' to {file_path}\nProject: {project_name}\nFolder: {project_folder}"
-            }
-        ]
+        saved = "\n".join(f"- {path}" for path, _ in writes)
+        return text_content(
+            f"Successfully saved {len(writes)} notes\nProject: {project_name}\nFolder: {project_folder}\n{saved}"
+        )
     except Exception as e:
-        raise Exception(f"Failed to save to Obsidian: {str(e)}")
+        raise Exception(f"Failed to save batch to Obsidian: {str(e)}")
+
+
+async def sync_obsidian():
+    """Wait until every queued note has been written to the vault"""
+    try:
+        await flush_pending_writes()
+    except Exception as e:
+        raise Exception(f"Failed to sync Obsidian notes: {str(e)}")
+
+    # Report every queued note that failed since the last sync, whichever flush wrote it
+    if failed_writes:
+        failures = "\n".join(f"- {path}: {e}" for path, e in failed_writes)
+        count = len(failed_writes)
+        del failed_writes[:]
+        raise Exception(f"Failed to write {count} queued notes:\n{failures}")
+    return text_content("All saved notes have been written to the vault")
 
 
 async def main():
     """Main entry point for the MCP server"""
-    async with stdio_server() as streams:
-        await server.run(
-            streams[0], 
-            streams[1], 
-            server.create_initialization_options()
-        )
+    try:
+        async with stdio_server() as streams:
+            await server.run(
+                streams[0], 
+                streams[1], 
+                server.create_initialization_options()
+            )
+    finally:
+        # Don't lose write-behind notes when the client disconnects
+        report_write_failures(await flush_pending_writes())
 
 
 if __name__ == "__main__":